@@ -42,6 +42,10 @@ CLI flags
 --game-depth NUM	            Which folder level becomes a <game> (0 = one global set)
 --loose-files {strip,parent}    How to wrap files that aren’t inside a sub‑folder at N depth
 --strip-ext / --no-strip-ext	Keep/remove extensions when game = file
+--workers NUM (CPU count)       Files hashed in parallel
+--mode {thread,process}         Hash on threads (default) or, if the GIL limits scaling, processes
+--cache-db FILE                 SQLite cache: skip files whose path/size/mtime are unchanged
+--hashes H[,H…] (crc,md5,sha1)  Digests to compute/emit: crc, md5, sha1, blake3
 
 Usage (easiest)
 -----
@@ -49,9 +53,15 @@ Usage (easiest)
 """
 
 from __future__ import annotations
-import argparse, datetime, hashlib, os, sys, time, zlib, xml.etree.ElementTree as ET
+import argparse, datetime, hashlib, mmap, os, sqlite3, sys, time, xml.etree.ElementTree as ET
+from array import array
+from itertools import chain
 from math import log2
 from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait,
+)
+from xml.sax.saxutils import escape
 try:
     from shutil import get_terminal_size
 except ImportError:
@@ -60,10 +70,29 @@ try:
     from tqdm import tqdm
 except ImportError:
     tqdm = None                              # fallback if tqdm not installed
+try:
+    from fastcrc import crc32 as _fastcrc    # PCLMULQDQ / PMULL folding CRC
+    crc32 = lambda data, crc=0: _fastcrc.iso_hdlc(data, crc)
+except ImportError:
+    try:
+        from zlib import crc32               # same polynomial, slice-by-N tables
+    except ImportError:
+        from binascii import crc32           # built-in table CRC; no zlib needed
+try:
+    from blake3 import blake3                # optional SIMD digest (--hashes blake3)
+except ImportError:
+    blake3 = None
 
-CHUNK  = 1 << 16    # 64 KiB
-PING_S = 1.0        # UI ping interval while hashing
-WIN_S  = 30         # rolling-window length for ETA (seconds)
+CHUNK  = 1 << 20    # 1 MiB – keeps OpenSSL's SHA-NI loop hot per call
+PING_S = 1.0        # UI refresh while the pool is busy on long files
+UI_S   = 0.2        # min seconds between progress redraws (5 Hz)
+SMALL_MAX = 8 << 20  # files up to this size are read in one go
+MMAP_MAX = sys.maxsize if sys.maxsize > 1 << 32 else 1 << 30   # largest file hashed via mmap
+QUEUE_MAX = 1 << 14  # finished-but-unwritten results buffered behind a slow file
+CACHE_BATCH = 1000   # --cache-db rows per commit
+PROC_BATCH = 64      # files per task under --mode process (amortises IPC)
+HASHES = ("crc", "md5", "sha1", "blake3")   # --hashes choices, in XML attribute order
+DEFAULT_HASHES = ("crc", "md5", "sha1")
 
 
 # ───────────────────────── helpers ─────────────────────────
@@ -76,19 +105,74 @@ def fmt_size(b: int) -> str:
 
 
 def discover(root: str):
-    """Walk *root* once, returning (file list, total bytes)."""
-    walker = os.walk(root)
+    """Scan *root* once, returning (abs paths, rel paths, sizes, mtimes, total).
+
+    The parallel sequences are in ``os.walk`` top-down order; sizes and
+    mtimes (ns) come from the ``DirEntry`` stat so nothing downstream re-stats.
+    """
+    bar = tqdm(desc="Scanning", unit=" directories", leave=False) if tqdm else None
+    abs_paths, rel_paths, sizes, mtimes, total = [], [], array("Q"), array("q"), 0
+    stack = [(os.path.abspath(root), "")]
+    while stack:
+        d, rel = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue                              # unreadable dir, as os.walk
+        subdirs = []
+        for e in entries:
+            if e.is_dir():
+                if not e.is_symlink():
+                    subdirs.append((e.path, rel + e.name + "/"))
+                continue
+            rel_p = rel + e.name
+            st = e.stat()
+            abs_paths.append(e.path)
+            rel_paths.append(rel_p)
+            sizes.append(st.st_size)
+            mtimes.append(st.st_mtime_ns)
+            total += st.st_size
+        stack.extend(reversed(subdirs))
+        if tqdm:
+            bar.update()
     if tqdm:
-        walker = tqdm(walker, desc="Scanning", unit=" directories", leave=False)
-    files, total = [], 0
-    for d, ds, fs in walker:
-        ds.sort(); fs.sort()
-        for f in fs:
-            abs_p = os.path.join(d, f)
-            rel_p = os.path.relpath(abs_p, root).replace(os.sep, "/")
-            files.append((abs_p, rel_p, rel_p.split("/")))
-            total += os.path.getsize(abs_p)
-    return files, total
+        bar.close()
+    return abs_paths, rel_paths, sizes, mtimes, total
+
+
+# ───────────────────── hash cache ─────────────────────
+def open_cache(path):
+    """Open (creating if needed) the ``--cache-db`` SQLite hash cache."""
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS h(path BLOB PRIMARY KEY, mtime INT, size INT, "
+        "crc TEXT, md5 TEXT, sha1 TEXT, blake3 TEXT)"
+    )
+    return db
+
+
+def cache_get(db, path, mtime, size, hashes):
+    """Cached ``{hash: hex}`` for *path*, or None if missing, stale or partial.
+
+    Paths are keyed as raw ``os.fsencode`` bytes: undecodable names
+    (surrogate-escaped by scandir) can't be stored as SQLite TEXT.
+    """
+    row = db.execute(
+        f"SELECT {', '.join(hashes)} FROM h WHERE path = ? AND mtime = ? AND size = ?",
+        (os.fsencode(path), mtime, size),
+    ).fetchone()
+    return dict(zip(hashes, row)) if row and None not in row else None
+
+
+def cache_put(db, path, mtime, size, digests):
+    db.execute(
+        f"INSERT OR REPLACE INTO h (path, mtime, size, {', '.join(digests)}) "
+        f"VALUES (?, ?, ?{', ?' * len(digests)})",
+        (os.fsencode(path), mtime, size, *digests.values()),
+    )
 
 
 # ───────────────────── header XML ─────────────────────
@@ -108,149 +192,350 @@ def build_header(parent: ET.Element, a):
             ET.SubElement(h, tag).text = val
     if a.forcepacking:
         ET.SubElement(h, "romvault", forcepacking=a.forcepacking)
+    return h
+
+
+# ───────────────────── streamed XML ─────────────────────
+_ATTR_ESC = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#09;"}
+
 
+def xml_attr(val: str) -> str:
+    """Escape *val* for a double-quoted attribute (same rules as ET)."""
+    return escape(val, _ATTR_ESC)
 
-# ───── hash a file with per-second ping ─────
-def hash_file(path, ping_cb):
-    size = os.path.getsize(path)
-    crc = 0
-    md5, sha1 = hashlib.md5(), hashlib.sha1()
-    last = time.monotonic()
-    with open(path, "rb") as f:
-        while chunk := f.read(CHUNK):
-            crc = zlib.crc32(chunk, crc)
-            md5.update(chunk)
-            sha1.update(chunk)
-            now = time.monotonic()
-            if now - last >= PING_S:
-                ping_cb()
-                last = now
-    return size, f"{crc & 0xFFFFFFFF:08x}", md5.hexdigest(), sha1.hexdigest()
+
+def place(rel_fp, a):
+    """Map one file to its (dirs, game, rom) names per --game-depth rules."""
+    if a.game_depth == 0:
+        return [], a.name or "DAT", rel_fp
+    # maxsplit leaves everything below the game level joined as the ROM path
+    parts = rel_fp.split("/", a.game_depth)
+    dirs = parts[: max(a.game_depth - 1, 0)]
+    game = (
+        parts[a.game_depth - 1]
+        if len(parts) >= a.game_depth
+        else (a.name or "DAT")
+    )
+    rom = parts[a.game_depth] if len(parts) > a.game_depth else parts[-1]
+
+    if game == rom:
+        if a.loose_files == "parent" and dirs:
+            game = dirs[-1]; dirs = dirs[:-1]
+        elif a.loose_files == "strip" and a.strip:
+            game, _ = os.path.splitext(game)
+    return dirs, game, rom
+
+
+class _CRC32:
+    """hashlib-style face on the module's ``crc32`` so it can sit in the loop."""
+    __slots__ = ("crc",)
+
+    def __init__(self):
+        self.crc = 0
+
+    def update(self, data):
+        self.crc = crc32(data, self.crc)
+
+    def hexdigest(self):
+        return f"{self.crc & 0xFFFFFFFF:08x}"
+
+
+_HASHERS = {"crc": _CRC32, "md5": hashlib.md5, "sha1": hashlib.sha1}
+if blake3:
+    _HASHERS["blake3"] = lambda: blake3(max_threads=blake3.AUTO)
+
+
+def _digest_chunks(chunks, hashes):
+    """Fused *hashes* over *chunks* → ``(bytes, {hash: hex})``.
+
+    Each block goes through every digest while it is still in cache,
+    so a large file is streamed from memory – or disk – exactly once.
+    """
+    hashers = [(name, _HASHERS[name]()) for name in hashes]
+    updates = [h.update for _, h in hashers]
+    nbytes = 0
+    for chunk in chunks:
+        for update in updates:
+            update(chunk)
+        nbytes += len(chunk)
+    return nbytes, {name: h.hexdigest() for name, h in hashers}
+
+
+def _read_blocks(f):
+    """Yield views of one reused CHUNK buffer, refilled with readinto()."""
+    buf = bytearray(CHUNK)
+    mv, readinto = memoryview(buf), f.readinto
+    while n := readinto(buf):
+        yield mv[:n]
+
+
+def fadvise(fd, advice: str):
+    """Best-effort ``posix_fadvise`` page-cache hint; a no-op where unsupported."""
+    if hasattr(os, "posix_fadvise") and hasattr(os, advice):
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+
+
+def _hash_fileobj(f, size, hashes):
+    # small files: one read, one update per digest
+    if 0 < size <= SMALL_MAX:
+        data = f.read(size + 1)           # +1 byte: notice growth since the scan
+        if len(data) == size:             # short reads (FUSE, network) keep going
+            return _digest_chunks((data,), hashes)
+        return _digest_chunks(chain((data,), _read_blocks(f)), hashes)
+
+    # large files: fused pass over the mapping, no read() copies
+    if 0 < size <= MMAP_MAX:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, OverflowError):
+            mm = None
+        if mm is not None:
+            with mm, memoryview(mm) as mv:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)  # big async readahead
+                if len(hashes) == 1:      # nothing to fuse: one C call, no loop
+                    blocks = (mv,)
+                else:
+                    blocks = (mv[i : i + CHUNK] for i in range(0, len(mv), CHUNK))
+                f.seek(len(mv))           # then anything appended since mmap()
+                return _digest_chunks(chain(blocks, _read_blocks(f)), hashes)
+
+    # fallback: chunked reads (empty/unmappable files, 32-bit overflow)
+    return _digest_chunks(_read_blocks(f), hashes)
+
+
+# ───── hash a file (the UI ticks from build_dat's pool wait) ─────
+def hash_file(path, size, hashes=DEFAULT_HASHES):
+    """Return ``(bytes hashed, {hash: hex})`` for *path*, one fused read pass.
+
+    *size* is the scan-time size; it only picks the read strategy. Every
+    path reads to EOF, so the byte count is what the digests actually saw.
+    """
+    with open(path, "rb", buffering=0) as f:      # raw FileIO: 1 syscall/read
+        fd = f.fileno()
+        fadvise(fd, "POSIX_FADV_SEQUENTIAL")      # widen kernel readahead
+        try:
+            return _hash_fileobj(f, size, hashes)
+        finally:
+            fadvise(fd, "POSIX_FADV_DONTNEED")    # read once: free the pages
+
+
+def _hash_batch(jobs, hashes):
+    """Pool worker – hash ``(path, size)`` jobs off the main thread.
+
+    Top-level and picklable so it also runs under ``--mode process``.
+    """
+    return [hash_file(path, size, hashes) for path, size in jobs]
 
 
 # ─────────────── build DAT + live UI ───────────────
-def build_dat(items, root, out_path, a, total_bytes):
+def build_dat(abs_paths, rel_paths, sizes, mtimes, out_path, a, total_bytes):
     cols = get_terminal_size((80, 24)).columns
 
+    # ── name every file, then group by (dirs, game) so the XML can stream ──
+    names, prev = [], None
+    for rel in rel_paths:
+        dirs, game, rom = place(rel, a)
+        if dirs == prev:
+            dirs = prev                   # siblings share one running dir list
+        else:
+            prev = dirs
+        names.append((dirs, game, rom))
+    # within a game, smallest first: steady progress, warm OS readahead
+    order = sorted(range(len(names)), key=lambda i: (*names[i][:2], sizes[i]))
+
+    # ── cache and pool first: a bad --cache-db must not truncate the DAT ─
+    hashes = [h for h in HASHES if h in a.hashes]
+    db = open_cache(a.cache_db) if a.cache_db else None
+    workers = max(1, a.workers)
+    if a.mode == "process":               # sidesteps the GIL, pays for IPC
+        ex, batch = ProcessPoolExecutor(max_workers=workers), PROC_BATCH
+    else:
+        ex, batch = ThreadPoolExecutor(max_workers=workers), 1
+
     # ── initialise progress bars ──
     if tqdm:
         header = tqdm(total=0, position=0, bar_format="{desc}", leave=False)
         bar = tqdm(
-            items,
             desc="Hashing",
-            unit="file",
-            total=len(items),
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            total=total_bytes,
             position=1,
             leave=False,
             dynamic_ncols=True,
-            bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}{postfix}]",
+            mininterval=UI_S,
+            smoothing=0.05,
+            bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}{postfix}]",
         )
     else:
-        header = None
-        bar = items
-
-    # ── build XML scaffold ──
-    root_el = ET.Element("datafile")
-    build_header(root_el, a)
-    g_global = (
-        ET.SubElement(root_el, "game", name=a.name or "DAT")
-        if a.game_depth == 0
-        else None
+        header = bar = None
+
+    # ── open output; dirs/game are written as the sorted order crosses them ─
+    out = open(
+        out_path, "w", encoding="utf-8", errors="xmlcharrefreplace",  # as ET.write
+        newline="\n", buffering=1 << 20,
     )
-    dir_cache, game_cache = {}, {}
+    pad = ["  " * d for d in range(max(a.game_depth, 1) + 2)]   # per-depth indent
+    out.write("<?xml version='1.0' encoding='utf-8'?>\n<datafile>\n  <header>\n")
+    for el in build_header(ET.Element("datafile"), a):
+        out.write(pad[2] + ET.tostring(el, encoding="unicode") + "\n")
+    out.write("  </header>\n")
+    open_dirs = []                        # names of the open <dir> stack
+    open_game = None                      # name of the open <game>
+    game_dirs = None                      # its dirs list (shared by siblings)
+
+    def emit(dirs, game, rom, size, digests):
+        nonlocal open_game, game_dirs
+        # sorted input: only boundaries change anything; same dir list is `is`
+        if game != open_game or (dirs is not game_dirs and dirs != game_dirs):
+            close_to(dirs)
+            for d in dirs[len(open_dirs) :]:
+                out.write(f'{pad[len(open_dirs) + 1]}<dir name="{xml_attr(d)}">\n')
+                open_dirs.append(d)
+            out.write(f'{pad[len(dirs) + 1]}<game name="{xml_attr(game)}">\n')
+            open_game, game_dirs = game, dirs
+        out.write(
+            f'{pad[len(dirs) + 2]}<rom name="{xml_attr(rom)}" size="{size}" '
+            + "".join(f'{k}="{v}" ' for k, v in digests.items())
+            + "/>\n"
+        )
+
+    def close_to(dirs):
+        """Close the open game and every open dir that isn't a prefix of *dirs*."""
+        nonlocal open_game
+        if open_game is not None:
+            out.write(f'{pad[len(open_dirs) + 1]}</game>\n')
+            open_game = None
+        if dirs is game_dirs:
+            return                        # next game in the same <dir> chain
+        keep = 0
+        while keep < min(len(open_dirs), len(dirs)) and open_dirs[keep] == dirs[keep]:
+            keep += 1
+        while len(open_dirs) > keep:
+            open_dirs.pop()
+            out.write(f'{pad[len(open_dirs) + 1]}</dir>\n')
+
+    line, last_ui = "", 0.0
+
+    # ── header shows the oldest file still being hashed (≤ 1 / UI_S) ────
+    def show(rel_fp, size):
+        nonlocal line, last_ui
+        now = time.monotonic()
+        if now - last_ui < UI_S:
+            return False
+        last_ui = now
+        size_str = fmt_size(size)
+        avail = cols - len(size_str) - 3
+        path_disp = rel_fp if len(rel_fp) <= avail else "…" + rel_fp[-(avail - 1) :]
+        line = f"{size_str} | {path_disp}"
+        if tqdm:
+            header.set_description_str(line, refresh=True)
+        else:
+            sys.stderr.write("\r" + line.ljust(cols))
+        return True
+
+    def warn(msg):
+        if tqdm:
+            tqdm.write(msg, file=sys.stderr)
+        else:
+            sys.stderr.write("\r" + msg.ljust(cols) + "\n")
 
-    done_bytes = 0
-    window = deque()                      # (timestamp, bytes_done)
+    # ── ping keeps the clock ticking while a long file hashes ────────────
+    def ping():
+        if tqdm:
+            bar.refresh(); header.refresh()
+        else:
+            sys.stderr.write("\r" + line.ljust(cols))
+
+    # ── bar runs in bytes (ETA tracks data); file count rides in the postfix ─
+    files_done = 0
+
+    def tick(nbytes, nfiles):
+        nonlocal files_done
+        files_done += nfiles
+        bar.set_postfix_str(f"{files_done:,}/{len(names):,} files", refresh=False)
+        bar.update(nbytes)
+
+    # ── hash pool: bounded in-flight window, results merged in order ─────
+    todo = iter(order)
+    queue = deque()                       # (future | None, index, slot | cached)
+    running = set()
+    jobs = []                             # misses waiting to fill a batch
+    unsaved = 0                           # cache rows since last commit
+
+    def flush():
+        if jobs:
+            fut = ex.submit(_hash_batch, [(abs_paths[i], sizes[i]) for i in jobs], hashes)
+            queue.extend((fut, i, slot) for slot, i in enumerate(jobs))
+            running.add(fut)
+            jobs.clear()
+
+    def submit():
+        while len(running) < 4 * workers and len(queue) < QUEUE_MAX:
+            i = next(todo, None)
+            if i is None:
+                break
+            hit = db and cache_get(db, abs_paths[i], mtimes[i], sizes[i], hashes)
+            if hit:                       # unchanged since last run: no hashing
+                flush()                   # earlier misses keep their place
+                queue.append((None, i, (sizes[i], hit)))
+                if tqdm:                  # never read: keep it out of rate/ETA
+                    bar.total -= sizes[i]
+                    tick(0, 1)
+                continue
+            jobs.append(i)
+            if len(jobs) >= batch:
+                flush()
+        flush()
 
     try:
-        for abs_fp, rel_fp, parts in bar:
-            # ── decide names ───────────────────────────────────────────────
-            if a.game_depth == 0:
-                dirs, game, rom = [], a.name or "DAT", rel_fp
-            else:
-                dirs = parts[: max(a.game_depth - 1, 0)]
-                game = (
-                    parts[a.game_depth - 1]
-                    if len(parts) >= a.game_depth
-                    else (a.name or "DAT")
-                )
-                rom = (
-                    "/".join(parts[a.game_depth :])
-                    if len(parts) > a.game_depth
-                    else parts[-1]
-                )
-
-            if game == rom:
-                if a.loose_files == "parent" and dirs:
-                    game = dirs[-1]; dirs = dirs[:-1]
-                elif a.loose_files == "strip" and a.strip:
-                    game, _ = os.path.splitext(game)
-
-            # ── update header BEFORE hashing ─────────────────────────────
-            size_str = fmt_size(os.path.getsize(abs_fp))
-            avail = cols - len(size_str) - 3
-            path_disp = rel_fp if len(rel_fp) <= avail else "…" + rel_fp[-(avail - 1) :]
-            line = f"{size_str} | {path_disp}"
-            if tqdm:
-                header.set_description_str(line, refresh=True)
-            else:
-                sys.stderr.write("\r" + line.ljust(cols))
-
-            # ── ping updates rolling ETA ─────────────────────────────────
-            def ping():
-                now = time.monotonic()
-                window.append((now, done_bytes))
-                while window and now - window[0][0] > WIN_S:
-                    window.popleft()
-                if len(window) > 1:
-                    span = now - window[0][0]
-                    delta = done_bytes - window[0][1]
-                    speed = delta / span if span else 0
-                    eta = (total_bytes - done_bytes) / speed if speed else 0
-                    if tqdm:
-                        bar.set_postfix(
-                            eta=time.strftime(
-                                "%H:%M:%S", time.gmtime(max(0, eta))
-                            ),
-                            refresh=False,
-                        )
-                if tqdm:
-                    bar.refresh(); header.refresh()
-                else:
-                    sys.stderr.write("\r" + line.ljust(cols))
-
-            # ── hash file ────────────────────────────────────────────────
-            size, crc, md5, sha1 = hash_file(abs_fp, ping)
-            done_bytes += size
-            ping()  # final update for this file
-
-            # ── XML dirs & game ──────────────────────────────────────────
-            parent = root_el
-            for lvl, d in enumerate(dirs, 1):
-                k = (lvl, "/".join(parts[:lvl]))
-                if k not in dir_cache:
-                    dir_cache[k] = ET.SubElement(parent, "dir", name=d)
-                parent = dir_cache[k]
-
-            if a.game_depth == 0:
-                game_el = g_global
-            else:
-                gk = (len(dirs), "/".join(dirs + [game]))
-                if gk not in game_cache:
-                    game_cache[gk] = ET.SubElement(parent, "game", name=game)
-                game_el = game_cache[gk]
-
-            ET.SubElement(
-                game_el,
-                "rom",
-                name=rom,
-                size=str(size),
-                crc=crc,
-                md5=md5,
-                sha1=sha1,
-            )
+        submit()
+        shown = None
+        while queue:
+            i = queue[0][1]
+            if i != shown and show(rel_paths[i], sizes[i]):
+                shown = i
+
+            if running:
+                done, _ = wait(running, timeout=PING_S, return_when=FIRST_COMPLETED)
+                running.difference_update(done)
+                if not done:
+                    ping()
+                elif tqdm:
+                    for f in done:
+                        if not f.exception():
+                            tick(sum(r[0] for r in f.result()), len(f.result()))
+
+            while queue and (queue[0][0] is None or queue[0][0].done()):
+                fut, i, res = queue.popleft()
+                if fut is not None:
+                    res = fut.result()[res]  # slot in the batch
+                    if res[0] != sizes[i]:
+                        warn(f"{rel_paths[i]}: size changed while hashing "
+                             f"({sizes[i]} → {res[0]} bytes); DAT uses the hashed size")
+                    if db:
+                        cache_put(db, abs_paths[i], mtimes[i], *res)
+                        unsaved += 1
+                        if unsaved >= CACHE_BATCH:
+                            db.commit(); unsaved = 0
+                emit(*names[i], *res)
+
+            submit()
 
     finally:
+        # ── stop queued work; in-flight files finish in the background ───
+        for fut in running:
+            fut.cancel()
+        ex.shutdown(wait=False)
+        if db:
+            db.commit()
+            db.close()
+
         # ── always write what we have ────────────────────────────────────
         if tqdm:
             bar.close()
@@ -258,13 +543,9 @@ def build_dat(items, root, out_path, a, total_bytes):
         else:
             print(file=sys.stderr)
 
-        try:
-            ET.indent(root_el, space="  ")
-        except AttributeError:
-            pass
-        ET.ElementTree(root_el).write(
-            out_path, encoding="utf-8", xml_declaration=True
-        )
+        close_to([])
+        out.write("</datafile>")
+        out.close()
         print(f"\nPartial (or complete) DAT written to {out_path}", file=sys.stderr)
 
 
@@ -291,10 +572,21 @@ def parse_args():
     pa.add_argument("--forcepacking", choices=["fileonly", "archive", "split"])
     pa.add_argument("--game-depth", type=int, default=1, metavar="N")
     pa.add_argument("--loose-files", choices=["strip", "parent"], default="strip")
+    pa.add_argument("--workers", type=int, default=os.cpu_count() or 1, metavar="N")
+    pa.add_argument("--mode", choices=["thread", "process"], default="thread")
+    pa.add_argument("--cache-db", metavar="FILE")
+    pa.add_argument("--hashes", default=",".join(DEFAULT_HASHES), metavar="H[,H…]")
     grp = pa.add_mutually_exclusive_group()
     grp.add_argument("--strip-ext", dest="strip", action="store_true", default=True)
     grp.add_argument("--no-strip-ext", dest="strip", action="store_false")
-    return pa.parse_args()
+    a = pa.parse_args()
+    a.hashes = [h.strip().lower() for h in a.hashes.split(",") if h.strip()]
+    bad = [h for h in a.hashes if h not in HASHES]
+    if bad or not a.hashes:
+        pa.error(f"--hashes: choose one or more of {','.join(HASHES)}")
+    if "blake3" in a.hashes and blake3 is None:
+        pa.error("--hashes blake3 needs the blake3 package (pip install blake3)")
+    return a
 
 
 def maybe_prompt(a):
@@ -333,14 +625,14 @@ def main():
     a = parse_args()
     maybe_prompt(a)
 
-    files, total_bytes = discover(a.source)
+    abs_paths, rel_paths, sizes, mtimes, total_bytes = discover(a.source)
     print(
-        f"Found {len(files):,} files ({fmt_size(total_bytes)}) – hashing …",
+        f"Found {len(rel_paths):,} files ({fmt_size(total_bytes)}) – hashing …",
         file=sys.stderr,
     )
 
     try:
-        build_dat(files, a.source, a.output, a, total_bytes)
+        build_dat(abs_paths, rel_paths, sizes, mtimes, a.output, a, total_bytes)
     except KeyboardInterrupt:
         print("\nInterrupted by user.", file=sys.stderr)
 